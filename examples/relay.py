@@ -1,9 +1,14 @@
-from time import sleep
+import asyncio
 
 from firmatazero import DigitalOutputDevice
 
-relay = DigitalOutputDevice(7, active_high=False, initial_value=True)
-relay.on()
-sleep(1)
-relay.off()
-sleep(1)
+
+async def main():
+    relay = DigitalOutputDevice(7, active_high=False, initial_value=True)
+    relay.on()
+    await asyncio.sleep(1)
+    relay.off()
+    await asyncio.sleep(1)
+
+
+asyncio.run(main())
@@ -27,5 +27,13 @@ __version__ = "0.0.1"
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
-from .output_devices import LED, DigitalOutputDevice, Servo
-from .shared_board import detect_port, get_board, set_board, set_port
+from .input_devices import DigitalInputDevice
+from .output_devices import LED, DigitalOutputDevice, DigitalOutputGroup, Servo
+from .shared_board import (
+    batch,
+    detect_port,
+    get_board,
+    set_board,
+    set_port,
+    sync,
+)
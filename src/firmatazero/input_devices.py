@@ -0,0 +1,103 @@
+from .shared_board import _LOCK, _pin_spec, get_board, wait_for_pin_change
+
+
+class DigitalInputDevice:
+    """
+    Represents a generic input device with typical on/off behaviour.
+
+    The following example prints whenever the button connected to pin 2
+    changes state, without polling::
+
+        import asyncio
+        from firmatazero import DigitalInputDevice
+
+        async def main():
+            button = DigitalInputDevice(2, pull_up=True)
+            while True:
+                print(await button.wait_for_change())
+
+        asyncio.run(main())
+
+    The board's reports are only processed while a :meth:`wait_for_change`
+    is running, or by pyFirmata2's sampling thread if ``samplingOn()`` is
+    called on the board instead (the two cannot be combined). Otherwise
+    :attr:`value` keeps returning the last processed state, :data:`None` if
+    there has been none.
+
+    :type pin: int or str
+    :param pin:
+        The pin that the device is connected to.
+        If pin is not int or str :exc:`AssertionError`
+        will be raised.
+
+    :param bool pull_up:
+        If :data:`True`, the pin will be pulled high with the Arduino's
+        internal resistor and the device is active when the pin is low.
+        If :data:`False` (the default), the device is active when the pin is
+        high.
+
+    :type pin_factory: None
+    :param pin_factory:
+        This does not do anything, makes compatible with gpiozero code.
+    """
+
+    __slots__ = ("_pin", "_pull_up", "_board_pin")
+
+    def __init__(
+        self,
+        pin=None,
+        *,
+        pull_up=False,
+        pin_factory=None,  # Ignored
+    ):
+        assert isinstance(pin, (str, int))
+
+        self._pin = pin
+        self._pull_up = bool(pull_up)
+
+        board = get_board()
+        with _LOCK:
+            self._board_pin = board.get_pin(
+                _pin_spec(pin, "u" if pull_up else "i")
+            )
+
+    def _to_value(self, level):
+        if level is None:
+            return None
+        return int(bool(level) != self._pull_up)
+
+    async def wait_for_change(self):
+        """
+        Wait until the board reports a new state for the pin and return the
+        new :attr:`value`.
+
+        The serial port is watched by the event loop, so waiting uses no CPU,
+        unlike a ``while True: await asyncio.sleep(0.1)`` polling loop which
+        wakes up constantly and can still miss or delay changes. Not
+        available on Windows, and cannot be combined with pyFirmata2's
+        ``samplingOn()``.
+        """
+        return self._to_value(await wait_for_pin_change(self._board_pin))
+
+    @property
+    def pin(self):
+        return self._pin
+
+    @property
+    def pull_up(self):
+        return self._pull_up
+
+    @property
+    def value(self):
+        """
+        Returns 1 if the device is currently active and 0 otherwise, or
+        :data:`None` if the board has not reported the pin yet. Only updated
+        while :meth:`wait_for_change` is running or with pyFirmata2's
+        ``samplingOn()``.
+        """
+        with _LOCK:
+            return self._to_value(self._board_pin.value)
+
+    @property
+    def is_active(self):
+        return bool(self.value)
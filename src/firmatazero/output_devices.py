@@ -1,8 +1,24 @@
-from .shared_board import shared_board, shared_lock
+import asyncio
+
+from .shared_board import (
+    _LOCK,
+    _pin_spec,
+    get_board,
+    queue_write,
+    sync,
+    write_level,
+    write_ports,
+)
 
 LED_BUILTIN = 13
 DEFAULT_SERVO = 9
 
+_DIGITAL_VALUES = frozenset((True, False, 1, 0))
+
+# Only code that touches a device's _board_pin (reads or writes the board)
+# needs _LOCK. Other attributes like _pin and _active_state are plain Python
+# state and accessors return them without locking.
+
 
 class DigitalOutputDevice:
     """
@@ -34,6 +50,15 @@ class DigitalOutputDevice:
         This does not do anything, makes compatible with gpiozero code.
     """
 
+    __slots__ = (
+        "_active_state",
+        "_pin",
+        "_board_pin",
+        "_on_value",
+        "_off_value",
+        "_cached_value",
+    )
+
     def __init__(
         self,
         pin=None,
@@ -44,41 +69,110 @@ class DigitalOutputDevice:
 
         assert isinstance(pin, (str, int))
 
-        self._active_state = active_high
+        self._active_state = bool(active_high)
+        self._on_value = self._active_state
+        self._off_value = not self._active_state
         self._pin = pin
 
-        with shared_board() as board:
-            self._board_pin = board.get_pin(f"d:{pin}:o")
+        board = get_board()
+        with _LOCK:
+            self._board_pin = board.get_pin(_pin_spec(pin, "o"))
 
-        self.value = self._get_value(initial_value)
-
-    def _get_value(self, value):
-        return value if self._active_state else not value
-
-    def on(self):
+            if initial_value is None:
+                self._cached_value = self._board_pin.read()
+            else:
+                value = self._on_value if initial_value else self._off_value
+                write_level(self._board_pin, value)
+                self._cached_value = value
+
+    def _write_level(self, value, force=False):
+        # Caller must hold _LOCK. Inside a batch() block the message is
+        # queued, the pin level and _cached_value still change right away.
+        if not queue_write(self._board_pin, value):
+            write_level(self._board_pin, value, force)
+        self._cached_value = value
+
+    def on(self, force=False):
         """
         Turns the device on.
+
+        :param bool force:
+            If :data:`True`, the message is sent even if the device is
+            already on, e.g. to re-assert the state after the pin was changed
+            externally.
         """
-        with shared_lock():
-            self._board_pin.write(self._get_value(True))
+        with _LOCK:
+            value = self._on_value
+            if value == self._cached_value and not force:
+                return
+
+            self._write_level(value, force)
 
-    def off(self):
+    def off(self, force=False):
         """
         Turns the device off.
+
+        :param bool force:
+            If :data:`True`, the message is sent even if the device is
+            already off, e.g. to re-assert the state after the pin was changed
+            externally.
         """
-        with shared_lock():
-            self._board_pin.write(self._get_value(False))
+        with _LOCK:
+            value = self._off_value
+            if value == self._cached_value and not force:
+                return
+
+            self._write_level(value, force)
 
     def toggle(self):
         """
         Reverse the state of the device. If it's on, turn it off; if it's off,
         turn it on.
         """
-        with shared_lock():
-            if self._get_value(self.value):
-                self.off()
-            else:
-                self.on()
+        with _LOCK:
+            self._write_level(not self._cached_value)
+
+    def read(self):
+        """
+        Returns the current pin level. Same as reading :attr:`value`, without
+        the property dispatch, for polling loops.
+        """
+        with _LOCK:
+            return self._board_pin.read()
+
+    def write(self, value):
+        """
+        Sets the pin level to *value*. Same as setting :attr:`value`, without
+        the property dispatch and validation.
+        """
+        with _LOCK:
+            self._write_level(bool(value))
+
+    async def on_async(self):
+        """
+        Turns the device on without blocking the running event loop. The
+        serial write runs in the loop's default executor.
+
+        Writes made this way run in another thread, so they are not queued by
+        a :func:`~firmatazero.batch` block of the calling thread. Not
+        compatible with eventlet's monkey-patching, which replaces the threads
+        the executor relies on.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.on)
+
+    async def off_async(self):
+        """
+        Turns the device off without blocking the running event loop. See
+        :meth:`on_async`.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.off)
+
+    async def toggle_async(self):
+        """
+        Reverse the state of the device without blocking the running event
+        loop. See :meth:`on_async`.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self.toggle)
 
     @property
     def value(self):
@@ -86,15 +180,19 @@ class DigitalOutputDevice:
         Returns 1 if the device is currently active and 0 otherwise. Setting
         this property changes the state of the device.
         """
-        with shared_lock():
+        with _LOCK:
             return self._board_pin.read()
 
     @value.setter
     def value(self, value):
-        assert value in {True, False, 1, 0}
+        assert value in _DIGITAL_VALUES
+
+        value = bool(value)
+        with _LOCK:
+            if value == self._cached_value:
+                return
 
-        with shared_lock():
-            self._board_pin.write(value)
+            self._write_level(value)
 
     @property
     def active_high(self):
@@ -113,21 +211,172 @@ class DigitalOutputDevice:
 
     @active_high.setter
     def active_high(self, value):
-        self._active_state = True if value else False
-        self._inactive_state = False if value else True
+        value = bool(value)
+        self._active_state = value
+        self._on_value = value
+        self._off_value = not value
+
+    @staticmethod
+    def set_many(devices, values):
+        """
+        Set the state of several devices at once. Devices that share a Firmata
+        port (8 pins per port) are updated with a single port message instead
+        of one message per pin.
+
+        :param list devices:
+            The :class:`DigitalOutputDevice` instances to update.
+
+        :param list values:
+            The new state for each device; :data:`True` turns the device on
+            and :data:`False` turns it off.
+        """
+        assert len(devices) == len(values)
+
+        ports = []
+        with _LOCK:
+            for device, value in zip(devices, values):
+                board_pin = device._board_pin
+                value = device._on_value if value else device._off_value
+                device._cached_value = value
+                # Inside a batch() block the messages are left to sync()
+                if queue_write(board_pin, value):
+                    continue
+
+                board_pin.value = value
+                if board_pin.port not in ports:
+                    ports.append(board_pin.port)
+
+            write_ports(ports)
+
+    def flush(self):
+        """
+        Send any writes queued by :func:`~firmatazero.batch` in this thread
+        and block until everything written to the board has been
+        transmitted.
+        """
+        sync()
+        with _LOCK:
+            self._board_pin.board.sp.flush()
+
+    @property
+    def is_active(self):
+        """
+        Returns :data:`True` if the device is currently active and
+        :data:`False` otherwise. Based on the last written state, does not
+        read the board.
+        """
+        return self._cached_value == self._on_value
 
     def __repr__(self):
         return (
-            "<firmatazero.%s object on pin %r, active_high=%s, is_active=%s>"
-            % (
-                self.__class__.__name__,
-                self.pin,
-                self.active_high,
-                self.is_active,
-            )
+            f"<firmatazero.{type(self).__name__} object on pin {self._pin!r}, "
+            f"active_high={self._active_state}, is_active={self.is_active}>"
         )
 
 
+class DigitalOutputGroup:
+    """
+    Represents a group of digital output pins that are written together.
+
+    The pins are grouped by Firmata port (pins 0-7 are port 0, pins 8-15 are
+    port 1, and so on) and each port is updated with a single digital port
+    message instead of one message per pin.
+
+    The following example turns pins 2 and 4 on and pin 3 off with one
+    message::
+
+        from firmatazero import DigitalOutputGroup
+        group = DigitalOutputGroup([2, 3, 4])
+        group.set(mask_on=(1 << 2) | (1 << 4), mask_off=1 << 3)
+
+    The pin levels are unknown until the first write, so the first
+    :meth:`set` writes every port of the group, turning off the pins not
+    set in *mask_on*.
+
+    :param list pins:
+        The pins of the group. If a pin is not int or str
+        :exc:`AssertionError` will be raised.
+    """
+
+    __slots__ = (
+        "_pins",
+        "_board_pins",
+        "_port_mask",
+        "_port_state",
+        "_ports",
+    )
+
+    def __init__(self, pins):
+        assert all(isinstance(pin, (str, int)) for pin in pins)
+
+        self._pins = tuple(pins)
+        self._board_pins = {}
+        self._port_mask = {}
+        self._port_state = {}
+        self._ports = {}
+
+        board = get_board()
+        with _LOCK:
+            for pin in self._pins:
+                board_pin = board.get_pin(_pin_spec(pin, "o"))
+                port, bit = divmod(board_pin.pin_number, 8)
+                self._board_pins.setdefault(port, []).append(board_pin)
+                self._port_mask[port] = self._port_mask.get(port, 0) | (
+                    1 << bit
+                )
+                self._port_state[port] = None  # Unknown until written
+                self._ports[port] = board.digital_ports[port]
+
+    def _update_port(self, port, value):
+        # Returns True if the port message was queued by batch(). All levels
+        # are set before queueing, so a sync() triggered by a full queue
+        # never sends a half updated port.
+        value &= self._port_mask[port]
+        board_pins = self._board_pins[port]
+        for board_pin in board_pins:
+            board_pin.value = bool(value & (1 << board_pin.pin_number % 8))
+        self._port_state[port] = value
+        return all(
+            queue_write(board_pin, board_pin.value) for board_pin in board_pins
+        )
+
+    def write_port(self, port, value):
+        """
+        Write the 8-bit *value* to Firmata *port*. Bit 0 is the first pin of
+        the port; bits of pins outside of the group are ignored.
+        """
+        assert port in self._ports
+
+        with _LOCK:
+            if not self._update_port(port, value):
+                self._ports[port].write()
+
+    def set(self, mask_on=0, mask_off=0):
+        """
+        Turn on the pins set in *mask_on* and turn off the pins set in
+        *mask_off*. Bit *n* of a mask is pin *n*. Only the ports whose state
+        changes are written, each with a single message.
+        """
+        ports = []
+        with _LOCK:
+            for port, state in self._port_state.items():
+                shift = port * 8
+                value = (state or 0) | (mask_on >> shift)
+                value &= ~(mask_off >> shift) & self._port_mask[port]
+                if value == state:
+                    continue
+
+                if not self._update_port(port, value):
+                    ports.append(self._ports[port])
+
+            if ports:
+                write_ports(ports)
+
+    @property
+    def pins(self):
+        return self._pins
+
+
 class LED:
     """
     Represents a light emitting diode(LED).
@@ -161,6 +410,8 @@ class LED:
         This does not do anything, makes compatible with gpiozero code.
     """
 
+    __slots__ = ("_pin", "_board_pin", "_cached_value")
+
     def __init__(
         self,
         pin=LED_BUILTIN,
@@ -172,48 +423,69 @@ class LED:
 
         self._pin = pin
 
-        with shared_board() as board:
-            self._board_pin = board.get_pin(f"d:{pin}:o")
+        board = get_board()
+        with _LOCK:
+            self._board_pin = board.get_pin(_pin_spec(pin, "o"))
+            self._cached_value = self._board_pin.read()
 
         if initial_value is True:
             self.value = initial_value
 
-    def on(self):
-        with shared_lock():
-            self._board_pin.write(True)
+    def _write_level(self, value, force=False):
+        # Caller must hold _LOCK, see DigitalOutputDevice._write_level
+        if not queue_write(self._board_pin, value):
+            write_level(self._board_pin, value, force)
+        self._cached_value = value
+
+    def on(self, force=False):
+        with _LOCK:
+            if self._cached_value is True and not force:
+                return
+
+            self._write_level(True, force)
+
+    def off(self, force=False):
+        with _LOCK:
+            if self._cached_value is False and not force:
+                return
 
-    def off(self):
-        with shared_lock():
-            self._board_pin.write(False)
+            self._write_level(False, force)
 
     def toggle(self):
-        with shared_lock():
-            if self.value:
-                self.off()
-            else:
-                self.on()
+        with _LOCK:
+            self._write_level(not self._cached_value)
+
+    def read(self):
+        with _LOCK:
+            return self._board_pin.read()
+
+    def write(self, value):
+        with _LOCK:
+            self._write_level(bool(value))
 
     @property
     def is_lit(self):
-        with shared_lock():
-            return self.value
+        return self.read()
 
     @property
     def pin(self):
-        with shared_lock():
-            return self._pin
+        return self._pin
 
     @property
     def value(self):
-        with shared_lock():
+        with _LOCK:
             return self._board_pin.read()
 
     @value.setter
     def value(self, value):
-        assert value in {True, False, 1, 0}
+        assert value in _DIGITAL_VALUES
+
+        value = bool(value)
+        with _LOCK:
+            if value == self._cached_value:
+                return
 
-        with shared_lock():
-            self._board_pin.write(value)
+            self._write_level(value)
 
 
 class Servo:
@@ -241,6 +513,24 @@ class Servo:
             servo.max()
             sleep(1)
 
+    Inside an asyncio program, use :func:`asyncio.sleep` instead so that the
+    event loop can run other tasks during the pauses::
+
+        import asyncio
+        from firmatazero import Servo
+
+        async def main():
+            servo = Servo(9)
+            while True:
+                servo.min()
+                await asyncio.sleep(1)
+                servo.mid()
+                await asyncio.sleep(1)
+                servo.max()
+                await asyncio.sleep(1)
+
+        asyncio.run(main())
+
     You can also use the :attr:`value` property to move the servo to a
     particular position, on a scale from -1 (min) to 1 (max) where 0 is the
     mid-point::
@@ -274,6 +564,8 @@ class Servo:
         This does not do anything, makes compatible with gpiozero code.
     """
 
+    __slots__ = ("_board_pin",)
+
     def __init__(
         self,
         pin=DEFAULT_SERVO,
@@ -290,54 +582,59 @@ class Servo:
         assert isinstance(min_pulse_width, (int, float))
         assert isinstance(max_pulse_width, (int, float))
 
-        with shared_board() as board:
-            self._board_pin = board.get_pin(f"d:{pin}:s")
+        board = get_board()
+        with _LOCK:
+            self._board_pin = board.get_pin(_pin_spec(pin, "s"))
             board.servo_config(
                 pin,
-                min_pulse=int(min_pulse_width * 1000.0 * 1000.0),
-                max_pulse=int(max_pulse_width * 1000.0 * 1000.0),
+                min_pulse=int(min_pulse_width * 1_000_000),
+                max_pulse=int(max_pulse_width * 1_000_000),
                 angle=int(Servo._to_degrees(initial_value)),
             )
 
     # Remap a number from one range to another.
     # Based on Arduino's map():
     # https://www.arduino.cc/reference/en/language/functions/math/map/
+    # Not used on the hot path, _to_degrees and _to_value have the constant
+    # ranges folded in.
     @staticmethod
     def _map(x, in_min, in_max, out_min, out_max):
         return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
 
+    # _map(x, -1, 1, 0, 180)
     @staticmethod
     def _to_degrees(x):
-        return Servo._map(x, -1, 1, 0, 180)
+        return 90.0 * x + 90.0
 
+    # _map(x, 0, 180, -1, 1)
     @staticmethod
     def _to_value(x):
-        return Servo._map(x, 0, 180, -1, 1)
+        return x / 90.0 - 1.0
 
     def min(self):
         """
         Set the servo to its minimum position.
         """
-        with shared_lock():
+        with _LOCK:
             self.value = -1
 
     def mid(self):
         """
         Set the servo to its mid-point position.
         """
-        with shared_lock():
+        with _LOCK:
             self.value = 0
 
     def max(self):
         """
         Set the servo to its maximum position.
         """
-        with shared_lock():
+        with _LOCK:
             self.value = 1
 
     @property
     def value(self):
-        with shared_lock():
+        with _LOCK:
             return Servo._to_value(self._board_pin.read())
 
     @value.setter
@@ -345,10 +642,9 @@ class Servo:
         assert isinstance(value, (int, float))
         assert -1 <= value <= 1
 
-        with shared_lock():
+        with _LOCK:
             self._board_pin.write(Servo._to_degrees(value))
 
     @property
     def is_active(self):
-        with shared_lock():
-            return True  # detach not supported yet
+        return True  # detach not supported yet
@@ -1,11 +1,26 @@
+import asyncio
 import atexit
 import contextlib
-from threading import RLock
+import functools
+from collections import deque
+from threading import RLock, local
 
 import pyfirmata2
 import serial
 from serial.tools import list_ports
 
+SERIAL_BUFFER_SIZE = 4096
+
+
+def _configure_serial(sp):
+    # Only Windows lets the driver buffers be resized. On POSIX writes go
+    # to the tty queue without waiting for it to drain (write_timeout is
+    # None by default), so nothing needs to be changed there.
+    if hasattr(sp, "set_buffer_size"):
+        sp.set_buffer_size(
+            rx_size=SERIAL_BUFFER_SIZE, tx_size=SERIAL_BUFFER_SIZE
+        )
+
 
 def detect_port():
     """Detect Arduino port
@@ -63,6 +78,7 @@ class SharedBoard:
                 port = SharedBoard._port
 
             SharedBoard._board = pyfirmata2.Arduino(port)
+            _configure_serial(SharedBoard._board.sp)
 
         return SharedBoard._board
 
@@ -74,6 +90,9 @@ class SharedBoard:
 
 atexit.register(SharedBoard.exit_handler)
 
+# Bound once so that hot paths can use `with _LOCK:` directly
+_LOCK = SharedBoard._board_access_lock
+
 
 def set_port(port):
     if SharedBoard._board is not None:
@@ -93,13 +112,28 @@ def set_board(board):
     SharedBoard._board = board
 
 
+@functools.lru_cache(maxsize=256)
+def _pin_spec(pin, mode):
+    # get_pin() definition, e.g. "d:13:o", cached for repeated construction
+    return f"d:{pin}:{mode}"
+
+
 def get_board():
-    return SharedBoard._get_board()
+    """Return the board shared by all devices, creating it on first use
+
+    Unlike shared_board(), does not hold the board lock once the board
+    exists.
+    """
+    board = SharedBoard._board
+    if board is None:
+        with _LOCK:
+            board = SharedBoard._get_board()
+    return board
 
 
 @contextlib.contextmanager
 def shared_board():
-    with SharedBoard._board_access_lock:
+    with _LOCK:
         try:
             yield SharedBoard._get_board()
         finally:
@@ -107,4 +141,162 @@ def shared_board():
 
 
 def shared_lock():
-    return SharedBoard._board_access_lock
+    return _LOCK
+
+
+BATCH_SIZE = 16
+
+_batch_state = local()
+
+
+@contextlib.contextmanager
+def batch(size=BATCH_SIZE):
+    """Coalesce digital writes made inside the with block
+
+    Writes are queued per thread and flushed with :func:`sync` when the
+    block exits or when size writes are pending. The pin
+    levels are updated right away, only the messages are deferred. All
+    queued writes are sent under a single lock acquisition, one message per
+    port.
+
+    Batching is per thread. A message from another thread for a pin on the
+    same port carries the whole port, so it sends the queued levels early.
+    """
+    if getattr(_batch_state, "pending", None) is not None:
+        # Nested batch, the outermost one flushes and sets the size
+        yield
+        return
+
+    assert isinstance(size, int) and size > 0
+
+    _batch_state.pending = deque(maxlen=size)
+    try:
+        yield
+    finally:
+        try:
+            sync()
+        finally:
+            _batch_state.pending = None
+
+
+def queue_write(board_pin, value):
+    """Queue a digital write if a batch is active in this thread
+
+    Sets the pin level immediately and defers the port message to
+    :func:`sync`. Returns True if the write was queued, False if there is no
+    active batch and the caller should write directly. Caller must hold the
+    board lock.
+    """
+    pending = getattr(_batch_state, "pending", None)
+    if pending is None:
+        return False
+
+    board_pin.value = value
+    pending.append(board_pin)
+    if len(pending) == pending.maxlen:
+        sync()
+    return True
+
+
+def sync():
+    """Flush digital writes queued by :func:`batch` in this thread"""
+    pending = getattr(_batch_state, "pending", None)
+    if not pending:
+        return
+
+    ports = []
+    with _LOCK:
+        while pending:
+            board_pin = pending.popleft()
+            if board_pin.port not in ports:
+                ports.append(board_pin.port)
+
+        write_ports(ports)
+
+
+def write_ports(ports):
+    """Write the output pins of several ports with one serial write
+
+    Builds the same digital message as pyFirmata2's Port.write() for each
+    port and sends them joined together. Caller must hold the board lock.
+    """
+    if ports:
+        ports[0].board.sp.write(b"".join(map(port_message, ports)))
+
+
+def port_message(port):
+    """Digital message setting the output pins of port to their values"""
+    mask = 0
+    for pin in port.pins:
+        if pin.mode == pyfirmata2.OUTPUT and pin.value == 1:
+            mask |= 1 << (pin.pin_number - port.port_number * 8)
+    return bytes(
+        (pyfirmata2.DIGITAL_MESSAGE + port.port_number, mask % 128, mask >> 7)
+    )
+
+
+def write_level(board_pin, value, force=False):
+    """Set a digital output pin and send the message for its port
+
+    Bypasses pyFirmata2's Pin.write(), which checks the pin mode on every
+    call; firmatazero's digital output pins stay in output mode. Nothing is
+    sent if the pin already has the value, unless force is True. Caller
+    must hold the board lock.
+    """
+    if force or value is not board_pin.value:
+        board_pin.value = value
+        board_pin.board.sp.write(port_message(board_pin.port))
+
+
+_pin_waiters = {}
+
+
+def _read_board(loop, board, fd):
+    waiters = _pin_waiters[fd]
+    try:
+        with _LOCK:
+            while board.bytes_available():
+                board.iterate()
+    except Exception as exc:
+        # E.g. SerialException on unplug: the fd stays readable, so stop
+        # watching it and hand the error to the waiters instead of spinning
+        loop.remove_reader(fd)
+        del _pin_waiters[fd]
+        for _, _, future in waiters:
+            if not future.done():
+                future.set_exception(exc)
+        return
+
+    for board_pin, value, future in waiters:
+        if board_pin.value != value and not future.done():
+            future.set_result(board_pin.value)
+
+
+async def wait_for_pin_change(board_pin):
+    """Wait until the board reports a new value for an input pin
+
+    The serial port is registered with the running event loop's
+    add_reader(), so the coroutine sleeps until data arrives instead of
+    polling. Incoming messages are handled here, so this must not be
+    combined with pyFirmata2's samplingOn(). Needs an event loop with
+    add_reader() support on the serial port, i.e. not Windows.
+    """
+    loop = asyncio.get_running_loop()
+    board = board_pin.board
+    fd = board.sp.fileno()
+
+    waiters = _pin_waiters.get(fd)
+    if waiters is None:
+        loop.add_reader(fd, _read_board, loop, board, fd)
+        waiters = _pin_waiters[fd] = []
+
+    waiter = (board_pin, board_pin.value, loop.create_future())
+    waiters.append(waiter)
+    try:
+        return await waiter[2]
+    finally:
+        waiters.remove(waiter)
+        # After a read error the reader is already gone
+        if not waiters and _pin_waiters.get(fd) is waiters:
+            loop.remove_reader(fd)
+            del _pin_waiters[fd]